@@ -1,4 +1,21 @@
-from search import SearchSpace, dfs
+import json
+import os
+import tempfile
+from collections import deque
+from functools import lru_cache
+from itertools import permutations, product
+from multiprocessing import Pool
+from search import SearchSpace
+
+
+# the (x,y,z) offset of a single step in each direction
+DIRS = {"E": (1, 0, 0), "W": (-1, 0, 0), "N": (0, 1, 0),
+        "S": (0, -1, 0), "U": (0, 0, 1), "D": (0, 0, -1)}
+
+# the directions that make a 90-degree turn from each direction
+TURNS = {"E": ("N", "S", "U", "D"), "W": ("N", "S", "U", "D"),
+         "N": ("E", "W", "U", "D"), "S": ("E", "W", "U", "D"),
+         "U": ("E", "W", "N", "S"), "D": ("E", "W", "N", "S")}
 
 
 def move(position, direction):
@@ -26,14 +43,12 @@ def move(position, direction):
         If the provided direction is not a member of the set {'N','S','E','W','U','D'}
     """
 
+    try:
+        delta_x, delta_y, delta_z = DIRS[direction]
+    except (KeyError, TypeError):
+        raise ValueError(f"Unrecognized direction: {direction}") from None
     x, y, z = position
-    deltas = {"E": (1, 0, 0), "W": (-1, 0, 0), "N": (0, 1, 0),
-              "S": (0, -1, 0), "U": (0, 0, 1), "D": (0, 0, -1)}
-    if direction not in deltas:
-        raise ValueError(f"Unrecognized direction: {direction}")
-    else:
-        delta_x, delta_y, delta_z = deltas[direction]
-        return x + delta_x, y + delta_y, z + delta_z
+    return x + delta_x, y + delta_y, z + delta_z
 
 
 def positions_visited(trajectory):
@@ -93,8 +108,8 @@ def is_connected(positions):
 
     Parameters
     ----------
-    positions : list[tuple[int]]
-        A list of 3-d coordinates.
+    positions : list[tuple[int]] or set[tuple[int]]
+        A collection of 3-d coordinates.
 
     Returns
     -------
@@ -102,40 +117,300 @@ def is_connected(positions):
         Whether the coordinates form a connected graph
     """
 
+    positions = set(positions)
     if len(positions) == 0:
         return True
-    else:
-        open_list = [positions[0]]
-        closed_list = set()
-        positions = set(positions[1:])
-        while len(open_list) > 0:
-            position, open_list = open_list[0], open_list[1:]
-            for adjacent in [move(position, d) for d in ['N', 'S', 'E', 'W', 'U', 'D']]:
-                if adjacent in positions:
-                    open_list.append(adjacent)
-                    positions.remove(adjacent)
-            closed_list.add(position)
-        return len(positions) == 0
+    open_list = deque([positions.pop()])
+    while open_list and positions:
+        x, y, z = open_list.popleft()
+        for adjacent in ((x + 1, y, z), (x - 1, y, z), (x, y + 1, z),
+                         (x, y - 1, z), (x, y, z + 1), (x, y, z - 1)):
+            if adjacent in positions:
+                open_list.append(adjacent)
+                positions.remove(adjacent)
+    return len(positions) == 0
+
+
+@lru_cache(maxsize=1 << 20)
+def _is_connected_mask(cells, strides):
+    """Variant of is_connected() for positions packed into the bits of an integer.
+
+    Rather than visiting one position at a time, this grows the connected region of
+    every reached position at once by shifting the whole bitmask by each stride.
+    The positions should be kept away from the edges of the packing grid, so that
+    shifting never wraps from one edge of the grid onto the other.
+
+    Different trajectories often leave the same unvisited positions behind, so the
+    results are cached.
+
+    Parameters
+    ----------
+    cells : int
+        A bitmask of packed 3-d coordinates (see SnakePuzzleSearchSpace.pack_position())
+    strides : tuple[int]
+        The packed offsets between neighboring positions along each axis
+
+    Returns
+    -------
+    bool
+        Whether the coordinates form a connected graph
+    """
+
+    reached = cells & -cells
+    while True:
+        grown = reached
+        for stride in strides:
+            grown |= (reached << stride) | (reached >> stride)
+        grown &= cells
+        if grown == reached:
+            return reached == cells
+        reached = grown
+
+
+def _degree_prune(cells, head, strides):
+    """Checks whether the unvisited cells of a snake puzzle are certain to be uncoverable.
+
+    The rest of the snake must trace a path that starts next to the current head and visits
+    every unvisited cell. Along such a path, every cell has two neighbors (counting the
+    head), except for the final cell, which has one. So the unvisited cells cannot be covered
+    if one of them has no available neighbors, or if more than one of them has exactly one.
+
+    Parameters
+    ----------
+    cells : int
+        A bitmask of the packed positions of the unvisited cells
+    head : int
+        The packed position of the snake's head
+    strides : tuple[int]
+        The packed offsets between neighboring positions along each axis
+
+    Returns
+    -------
+    bool
+        True iff the unvisited cells certainly cannot be covered by the rest of the snake
+    """
+
+    available = cells | (1 << head)
+    # bitwise counters of whether each cell has at least one/two available neighbors
+    one, two = 0, 0
+    for stride in strides:
+        for neighbors in (available >> stride, available << stride):
+            neighbors &= cells
+            two |= one & neighbors
+            one |= neighbors
+    if cells & ~one:
+        return True
+    endpoints = one & ~two
+    return endpoints & (endpoints - 1) != 0
+
+
+@lru_cache(maxsize=None)
+def _cube_symmetries(cube_width):
+    """Enumerates the 48 rotations and reflections of a cube.
+
+    The cells of the cube are numbered so that cell (x,y,z) has index
+    (x * cube_width + y) * cube_width + z, and directions are numbered in the order
+    of DIRS.
+
+    Parameters
+    ----------
+    cube_width : int
+        The width of the cube
+
+    Returns
+    -------
+    tuple[tuple[tuple[tuple[int]], tuple[int], tuple[int]]]
+        For each symmetry: lookup tables that map each 8-bit chunk of a bitmask of cells
+        to the bitmask of their images, the index that it maps each cell to, and the
+        index that it maps each direction to
+    """
+
+    directions = list(DIRS.values())
+    symmetries = []
+    for axes in permutations(range(3)):
+        for flips in product((False, True), repeat=3):
+            def transform(point, top):
+                return tuple(top - point[axis] if flip else point[axis]
+                             for axis, flip in zip(axes, flips))
+            cell_map = tuple((x * cube_width + y) * cube_width + z
+                             for x, y, z in (transform(cell, cube_width - 1)
+                                             for cell in product(range(cube_width), repeat=3)))
+            direction_map = tuple(directions.index(transform(delta, 0)) for delta in directions)
+            mask_tables = []
+            for chunk in range(0, len(cell_map), 8):
+                table = [0] * 256
+                for bits in range(1, 256):
+                    lowest = (bits & -bits).bit_length() - 1
+                    if chunk + lowest < len(cell_map):
+                        table[bits] = table[bits & (bits - 1)] | (1 << cell_map[chunk + lowest])
+                    else:
+                        table[bits] = table[bits & (bits - 1)]
+                mask_tables.append(tuple(table))
+            symmetries.append((tuple(mask_tables), cell_map, direction_map))
+    return tuple(symmetries)
 
 
+class SnakeTrajectory:
+    """A mutable search state for the snake puzzle that is updated incrementally.
+
+    Rather than recomputing every visited position from the origin whenever a direction
+    is appended, this state keeps track of the visited positions, the current position of
+    the snake's head and the bounding box of the trajectory. It is updated in place by
+    SnakePuzzleSearchSpace.apply() and restored by SnakePuzzleSearchSpace.undo().
+
+    Attributes
+    ----------
+    directions : list[str]
+        The sequence of directions traveled so far
+    visited : int
+        A bitmask of the positions visited so far, expressed relative to the origin and
+        packed into integers (see SnakePuzzleSearchSpace.pack_position())
+    head : list[int]
+        The current position of the snake's head
+    head_index : int
+        The packed equivalent of head
+    bbox_min : list[int]
+        The minimum (x,y,z) coordinates visited so far
+    bbox_max : list[int]
+        The maximum (x,y,z) coordinates visited so far
+    """
+
+    def __init__(self, origin_index):
+        self.directions = []
+        self.visited = 1 << origin_index
+        self.head = [0, 0, 0]
+        self.head_index = origin_index
+        self.bbox_min = [0, 0, 0]
+        self.bbox_max = [0, 0, 0]
+
 
 class SnakePuzzleSearchSpace(SearchSpace):
 
     def __init__(self, multipliers, cube_width):
         super().__init__()
         self.multipliers = multipliers
-        self.pivot_points = set([sum(self.multipliers[:i]) for i in range(len(self.multipliers))])
+        self.pivot_points = frozenset([sum(self.multipliers[:i]) for i in range(len(self.multipliers))])
+        self._total_length = sum(self.multipliers)
+        self._is_pivot = [length in self.pivot_points for length in range(self._total_length + 1)]
         self.start_state = ('E',)
         self.cube_width = cube_width
         self.goal_positions = set([(x,y,z)
                                    for x in range(0, cube_width)
                                    for y in range(0, cube_width)
                                    for z in range(0, cube_width)])
+        # Positions are packed into integers on a grid wide enough to hold every
+        # coordinate a trajectory can reach before the cube width check rejects it.
+        # The cube itself never touches the edges of this grid, so sets of positions
+        # can be stored as bitmasks and shifted without wrapping around.
+        self._radix = 2 * cube_width + 1
+        self._steps = {direction: self.pack_position(delta) - self.pack_position((0, 0, 0))
+                       for direction, delta in DIRS.items()}
+        self._strides = (self._steps["E"], self._steps["N"], self._steps["U"])
+        # for each direction: the axis it moves along, the sign of the move and its step
+        self._moves = {direction: (axis, delta[axis], self._steps[direction])
+                       for direction, delta in DIRS.items()
+                       for axis in range(3) if delta[axis] != 0}
+        self._cube_offsets = [self.pack_position(position) - self.pack_position((0, 0, 0))
+                              for position in product(range(cube_width), repeat=3)]
+        self._cube_mask = sum(1 << offset for offset in self._cube_offsets)
+        self._cube_rows = [self.pack_position((x, y, 0)) - self.pack_position((0, 0, 0))
+                           for x, y in product(range(cube_width), repeat=2)]
+        self._direction_indices = {direction: i for i, direction in enumerate(DIRS)}
+        self._symmetries = _cube_symmetries(cube_width)
 
+    def pack_position(self, position):
+        """Packs an (x,y,z) position into a single integer.
+
+        This is only valid for the coordinates explored by SnakeTrajectory states,
+        i.e. each coordinate must lie between -cube_width and cube_width.
+
+        Parameters
+        ----------
+        position : tuple[int]
+            A position, expressed as (x,y,z) coordinates
+
+        Returns
+        -------
+        int
+            The packed position
+        """
+
+        x, y, z = position
+        w, r = self.cube_width, self._radix
+        return ((x + w) * r + (y + w)) * r + (z + w)
+
+    def unpack_position(self, index):
+        """Inverse of .pack_position().
+
+        Parameters
+        ----------
+        index : int
+            A packed position
+
+        Returns
+        -------
+        tuple[int]
+            The (x,y,z) coordinates of the position
+        """
+
+        w, r = self.cube_width, self._radix
+        rest, z = divmod(index, r)
+        x, y = divmod(rest, r)
+        return x - w, y - w, z - w
+
+    def canonical_key(self, state):
+        """Computes a key that is shared by all states equivalent to an incremental state.
+
+        Once the trajectory spans the full width of the cube along every axis, its
+        future depends only on which cells of the cube have been visited, the position
+        of the head and the current heading (the trajectory length is implied by the
+        number of visited cells). States that only differ by a rotation or reflection of
+        the cube are equivalent, so the key is the smallest encoding of these three
+        values over the 48 symmetries of the cube.
+
+        Parameters
+        ----------
+        state : SnakeTrajectory
+            An incremental state of the search space
+
+        Returns
+        -------
+        int or None
+            The canonical key of the state, or None if the placement of the cube
+            is not yet determined
+        """
+
+        return self._canonical_key(state.visited, state.bbox_min, state.bbox_max,
+                                   state.head_index, state.directions[-1])
+
+    def _canonical_key(self, visited, bbox_min, bbox_max, head_index, heading):
+        """Computes .canonical_key() from the fields of a SnakeTrajectory."""
+
+        w = self.cube_width
+        if any(hi - lo < w - 1 for lo, hi in zip(bbox_min, bbox_max)):
+            return None
+        anchor = self.pack_position(bbox_min)
+        row_mask = (1 << w) - 1
+        cube_visited = 0
+        for i, offset in enumerate(self._cube_rows):
+            cube_visited |= (visited >> (anchor + offset) & row_mask) << (i * w)
+        chunks = [cube_visited >> shift & 255 for shift in range(0, w ** 3, 8)]
+        head = self._cube_offsets.index(head_index - anchor)
+        heading = self._direction_indices[heading]
+        best = None
+        for mask_tables, cell_map, direction_map in self._symmetries:
+            mask = 0
+            for table, chunk in zip(mask_tables, chunks):
+                mask |= table[chunk]
+            key = (mask << 16) | (cell_map[head] << 4) | direction_map[heading]
+            if best is None or key < best:
+                best = key
+        return best
 
     def at_pivot(self, state):
         """Returns whether we're at a 'choice point' in the puzzle."""
-        return len(state) in self.pivot_points
+        length = len(state)
+        return length <= self._total_length and self._is_pivot[length]
 
 
     def get_start_state(self):
@@ -170,8 +445,10 @@ class SnakePuzzleSearchSpace(SearchSpace):
             True iff the state is a goal state
         """
 
-        positions = shift_into_positive_space(positions_visited(state))
-        return set(positions) == self.goal_positions
+        positions = set(positions_visited(state))
+        return (len(positions) == len(self.goal_positions)
+                and all(max(coords) - min(coords) == self.cube_width - 1
+                        for coords in zip(*positions)))
 
     def is_valid_state(self, state):
         """Checks whether a given state can possibly lead to a goal state.
@@ -190,12 +467,8 @@ class SnakePuzzleSearchSpace(SearchSpace):
         bool
             True iff the state can possibly be extended to become a goal state.
         """
-        positions = shift_into_positive_space(positions_visited(state))
-        max_x = max([x for x,_,_ in positions])
-        max_y = max([y for _,y,_ in positions])
-        max_z = max([z for _,_,z in positions])
-        unvisited = list(self.goal_positions - set(positions)) # we check to see that we haven't bisected the unvisited coordinates into two distinct regions
-        return max(max_x, max_y, max_z) < self.cube_width and len(set(positions)) == len(positions) and is_connected(unvisited)
+        trajectory = self._replay(state)
+        return trajectory is not None and self.is_valid_trajectory(trajectory)
 
     def get_successors(self, state):
         """Determines the possible successors of a state.
@@ -210,7 +483,9 @@ class SnakePuzzleSearchSpace(SearchSpace):
         to derive a successor.
 
         This method also filters out successors that lead to "invalid" states, as determined
-        by the .is_valid_state() method.
+        by the .is_valid_state() method. The remaining successors are ordered so that
+        search.dfs (which tries the last successor first) tries the most constrained
+        successors first (see .valid_directions()).
 
         Parameters
         ----------
@@ -223,19 +498,215 @@ class SnakePuzzleSearchSpace(SearchSpace):
             The list of valid successor states.
         """
 
-        if len(state) >= sum(self.multipliers):
+        trajectory = self._replay(state)
+        if trajectory is None:
             return []
-        next_directions = []
-        if not self.at_pivot(state):
-            next_directions = [state[-1]]
-        elif state[-1] in ["E", "W"]:
-            next_directions = ["N", "S", "U", "D"]
-        elif state[-1] in ["N", "S"]:
-            next_directions = ["E", "W", "U", "D"]
-        elif state[-1] in ["U", "D"]:
-            next_directions = ["E", "W", "N", "S"]
-        candidates = [state + (direction,) for direction in next_directions]
-        return [candidate for candidate in candidates if self.is_valid_state(candidate)]
+        directions = self.valid_directions(trajectory, self.next_directions(state))
+        return [state + (direction,) for direction in reversed(directions)]
+
+    def next_directions(self, state):
+        """Determines the directions that may be appended to a state.
+
+        Parameters
+        ----------
+        state : tuple[str] or list[str]
+            A sequence of directions
+
+        Returns
+        -------
+        tuple[str]
+            The directions that may be appended, before any validity checks
+        """
+
+        length = len(state)
+        if length >= self._total_length:
+            return ()
+        if not self._is_pivot[length]:
+            return (state[-1],)
+        return TURNS.get(state[-1], ())
+
+    def get_incremental_start_state(self):
+        """Returns the start state as a SnakeTrajectory.
+
+        Returns
+        -------
+        SnakeTrajectory
+            The incremental equivalent of .get_start_state()
+        """
+
+        return self._replay(self.start_state)
+
+    def _replay(self, directions):
+        """Builds the SnakeTrajectory for a sequence of directions.
+
+        Returns None if one of the moves is rejected by .apply().
+        """
+
+        state = SnakeTrajectory(self.pack_position((0, 0, 0)))
+        for direction in directions:
+            if self.apply(state, direction) is None:
+                return None
+        return state
+
+    def apply(self, state, direction):
+        """Appends a direction to an incremental state, modifying it in place.
+
+        The move is rejected (and the state left untouched) if the new head position
+        has already been visited, or if it stretches the bounding box of the trajectory
+        beyond the width of the cube.
+
+        Parameters
+        ----------
+        state : SnakeTrajectory
+            An incremental state of the search space
+        direction : str
+            The direction in which to travel ('N','S','E','W','U','D')
+
+        Returns
+        -------
+        tuple or None
+            The information needed by .undo() to reverse the move, or None if the move
+            was rejected
+        """
+
+        try:
+            axis, sign, step = self._moves[direction]
+        except (KeyError, TypeError):
+            raise ValueError(f"Unrecognized direction: {direction}") from None
+        new_index = state.head_index + step
+        if state.visited >> new_index & 1:
+            return None
+        # only the coordinate along the axis of travel changes
+        coord = state.head[axis] + sign
+        lo, hi = state.bbox_min[axis], state.bbox_max[axis]
+        if coord < lo:
+            if hi - coord >= self.cube_width:
+                return None
+            state.bbox_min[axis] = coord
+        elif coord > hi:
+            if coord - lo >= self.cube_width:
+                return None
+            state.bbox_max[axis] = coord
+        state.directions.append(direction)
+        state.visited |= 1 << new_index
+        state.head[axis] = coord
+        state.head_index = new_index
+        return direction, lo, hi
+
+    def undo(self, state, delta):
+        """Reverses a move previously made by .apply(), modifying the state in place.
+
+        Parameters
+        ----------
+        state : SnakeTrajectory
+            An incremental state of the search space
+        delta : tuple
+            The value returned by the corresponding call to .apply()
+        """
+
+        direction, lo, hi = delta
+        axis, sign, step = self._moves[direction]
+        state.directions.pop()
+        state.visited &= ~(1 << state.head_index)
+        state.head[axis] -= sign
+        state.head_index -= step
+        state.bbox_min[axis], state.bbox_max[axis] = lo, hi
+
+    def is_goal_trajectory(self, state):
+        """Incremental equivalent of .is_goal_state().
+
+        Since .apply() never revisits a position or leaves the cube, it suffices to
+        count the visited positions.
+
+        Parameters
+        ----------
+        state : SnakeTrajectory
+            An incremental state of the search space
+
+        Returns
+        -------
+        bool
+            True iff the state is a goal state
+        """
+
+        return len(state.directions) + 1 == self.cube_width ** 3
+
+    def is_valid_trajectory(self, state):
+        """Incremental equivalent of .is_valid_state().
+
+        The uniqueness and bounding box constraints are already enforced by .apply(),
+        so this only checks that the unvisited positions of the cube (anchored at the
+        minimum coordinates visited so far) remain connected. Once the trajectory spans
+        the full width of the cube along every axis (so the cube's placement is no longer
+        a guess), the unvisited positions are also checked for dead ends.
+
+        Parameters
+        ----------
+        state : SnakeTrajectory
+            An incremental state of the search space
+
+        Returns
+        -------
+        bool
+            True iff the state can possibly be extended to become a goal state.
+        """
+
+        unvisited = (self._cube_mask << self.pack_position(state.bbox_min)) & ~state.visited
+        placed = all(hi - lo == self.cube_width - 1
+                     for lo, hi in zip(state.bbox_min, state.bbox_max))
+        if placed and _degree_prune(unvisited, state.head_index, self._strides):
+            return False
+        return _is_connected_mask(unvisited, self._strides)
+
+
+    def free_neighbors(self, state):
+        """Counts the unvisited positions of the cube adjacent to the snake's head.
+
+        Parameters
+        ----------
+        state : SnakeTrajectory
+            An incremental state of the search space
+
+        Returns
+        -------
+        int
+            The number of unvisited positions adjacent to the head
+        """
+
+        unvisited = (self._cube_mask << self.pack_position(state.bbox_min)) & ~state.visited
+        return sum(unvisited >> (state.head_index + step) & 1 for step in self._steps.values())
+
+    def valid_directions(self, state, directions):
+        """Filters and orders the directions that may be appended to an incremental state.
+
+        Following Warnsdorff's rule, directions whose new head has the fewest unvisited
+        neighbors are tried first, since those positions are the hardest to reach later
+        on. Ties are broken in the order that search.dfs would try them, i.e. last first.
+
+        Parameters
+        ----------
+        state : SnakeTrajectory
+            An incremental state of the search space
+        directions : tuple[str]
+            The candidate directions (see .next_directions())
+
+        Returns
+        -------
+        list[str]
+            The directions that lead to valid states, in the order they should be tried
+        """
+
+        scored = []
+        for direction in reversed(directions):
+            delta = self.apply(state, direction)
+            if delta is None:
+                continue
+            if self.is_valid_trajectory(state):
+                score = self.free_neighbors(state) if len(directions) > 1 else 0
+                scored.append((score, direction))
+            self.undo(state, delta)
+        scored.sort(key=lambda item: item[0])
+        return [direction for _, direction in scored]
 
 
 class StandardSnakePuzzle(SnakePuzzleSearchSpace):
@@ -253,12 +724,378 @@ class SnakePuzzleC(SnakePuzzleSearchSpace):
         super().__init__(multipliers=(1, 1, 1, 2, 2, 1, 2, 2, 1, 1, 1, 1, 2, 2, 1, 2, 1, 2),
                          cube_width=3)
 
+def incremental_dfs(space):
+    """Runs depth-first search (DFS) on a snake puzzle using an incremental state.
+
+    This explores the same search tree as search.dfs, in the same order, but extends
+    and backtracks a single SnakeTrajectory in place instead of rebuilding the visited
+    positions of every candidate from scratch. It also remembers the canonical keys of
+    the states it has explored (see SnakePuzzleSearchSpace.canonical_key()), so that it
+    never explores a state equivalent to one that has already failed.
+
+    Parameters
+    ----------
+    space : SnakePuzzleSearchSpace
+        The search space
+
+    Returns
+    -------
+    tuple[str]
+        The first goal state found, or None if there is no goal state
+    """
+
+    state = space.get_incremental_start_state()
+    if space.is_goal_trajectory(state):
+        return tuple(state.directions)
+    seen = set()
+    # one iterator over the remaining directions per level, and the moves made so far
+    stack = [iter(space.valid_directions(state, space.next_directions(state.directions)))]
+    deltas = []
+    while stack:
+        direction = next(stack[-1], None)
+        if direction is None:
+            stack.pop()
+            if deltas:
+                space.undo(state, deltas.pop())
+            continue
+        delta = space.apply(state, direction)
+        key = space.canonical_key(state)
+        if key in seen:
+            space.undo(state, delta)
+            continue
+        if key is not None:
+            seen.add(key)
+        if space.is_goal_trajectory(state):
+            return tuple(state.directions)
+        deltas.append(delta)
+        stack.append(iter(space.valid_directions(state, space.next_directions(state.directions))))
+    return None
+
+
+def _solve_branch(args):
+    """Runs incremental_dfs() from a given prefix of directions (see parallel_dfs())."""
+
+    multipliers, cube_width, prefix = args
+    space = SnakePuzzleSearchSpace(multipliers, cube_width)
+    space.start_state = prefix
+    return incremental_dfs(space)
+
+
+def parallel_dfs(space, processes=None):
+    """Runs incremental_dfs() on a snake puzzle, exploring independent branches in parallel.
+
+    The search follows the trajectory from the start state until it reaches the first
+    choice between several valid directions. The subtree of each of those directions is
+    then searched by a separate worker process. The branches are consulted in the order
+    that incremental_dfs() would search them, so the result is the same as that of
+    incremental_dfs(). The remaining workers are terminated as soon as it is known.
+
+    Parameters
+    ----------
+    space : SnakePuzzleSearchSpace
+        The search space
+    processes : int
+        The number of worker processes (defaults to the number of CPUs)
+
+    Returns
+    -------
+    tuple[str]
+        The first goal state found, or None if there is no goal state
+    """
+
+    state = space.get_incremental_start_state()
+    while True:
+        if space.is_goal_trajectory(state):
+            return tuple(state.directions)
+        directions = space.valid_directions(state, space.next_directions(state.directions))
+        if len(directions) != 1:
+            break
+        space.apply(state, directions[0])
+    branches = [(space.multipliers, space.cube_width, tuple(state.directions) + (direction,))
+                for direction in directions]
+    if len(branches) == 0:
+        return None
+    with Pool(processes) as pool:
+        for solution in pool.imap(_solve_branch, branches):
+            if solution is not None:
+                return solution
+    return None
+
+
+_SOLVER_TEMPLATE = """
+def ordered_directions(directions, visited, head, head_index, bbox_min, bbox_max):
+    length = len(directions)
+    if length >= {total}:
+        return ()
+    if not IS_PIVOT[length]:
+        candidates = directions[-1:]
+    else:
+        candidates = REVERSED_TURNS[directions[-1]]
+    scored = []
+    for direction in candidates:
+        axis, sign, step = MOVES[direction]
+        new_index = head_index + step
+        if visited >> new_index & 1:
+            continue
+        coord = head[axis] + sign
+        lo, hi = bbox_min[axis], bbox_max[axis]
+        if coord - lo >= {w} or hi - coord >= {w}:
+            continue
+        bbox_min[axis], bbox_max[axis] = min(lo, coord), max(hi, coord)
+        anchor = ((bbox_min[0] + {w}) * {r} + (bbox_min[1] + {w})) * {r} + (bbox_min[2] + {w})
+        unvisited = ({cube_mask} << anchor) & ~(visited | (1 << new_index))
+        placed = (bbox_max[0] - bbox_min[0] == {w1} and bbox_max[1] - bbox_min[1] == {w1}
+                  and bbox_max[2] - bbox_min[2] == {w1})
+        if (not (placed and degree_prune(unvisited, new_index, {strides}))
+                and is_connected_mask(unvisited, {strides})):
+            score = 0
+            if len(candidates) > 1:
+                score = {free_neighbors}
+            scored.append((score, direction))
+        bbox_min[axis], bbox_max[axis] = lo, hi
+    scored.sort(key=lambda item: item[0])
+    return [direction for _, direction in scored]
+
+
+def solve():
+    directions = {directions}
+    visited = {visited}
+    head = {head}
+    head_index = {head_index}
+    bbox_min = {bbox_min}
+    bbox_max = {bbox_max}
+    if len(directions) + 1 == {n_cells}:
+        return tuple(directions)
+    seen = set()
+    stack = [iter(ordered_directions(directions, visited, head, head_index, bbox_min, bbox_max))]
+    deltas = []
+    while stack:
+        direction = next(stack[-1], None)
+        if direction is None:
+            stack.pop()
+            if deltas:
+                direction, lo, hi = deltas.pop()
+                axis, sign, step = MOVES[direction]
+                directions.pop()
+                visited &= ~(1 << head_index)
+                head[axis] -= sign
+                head_index -= step
+                bbox_min[axis], bbox_max[axis] = lo, hi
+            continue
+        axis, sign, step = MOVES[direction]
+        lo, hi = bbox_min[axis], bbox_max[axis]
+        head_index += step
+        visited |= 1 << head_index
+        coord = head[axis] + sign
+        head[axis] = coord
+        if coord < lo:
+            bbox_min[axis] = coord
+        elif coord > hi:
+            bbox_max[axis] = coord
+        directions.append(direction)
+        deltas.append((direction, lo, hi))
+        if len(directions) + 1 == {n_cells}:
+            return tuple(directions)
+        key = canonical_key(visited, bbox_min, bbox_max, head_index, direction)
+        if key in seen:
+            # an exhausted level, so that the next iteration undoes this move
+            stack.append(iter(()))
+            continue
+        if key is not None:
+            seen.add(key)
+        stack.append(iter(ordered_directions(directions, visited, head, head_index,
+                                             bbox_min, bbox_max)))
+    return None
+"""
+
+
+def build_solver(multipliers, cube_width):
+    """Generates a solver specialized to a particular snake puzzle.
+
+    The solver performs the same search as incremental_dfs(), but the state of the
+    search is kept in local variables, the constants of the puzzle (the width of the
+    cube, the length of the snake, the packing of positions into bitmasks, etc.) are
+    written into its source code as literals, and the methods of SnakePuzzleSearchSpace
+    and SnakeTrajectory are inlined. Solvers are cached, so each puzzle is only
+    compiled once.
+
+    Parameters
+    ----------
+    multipliers : tuple[int] or list[int]
+        The segment lengths of the snake
+    cube_width : int
+        The width of the cube to be formed
+
+    Returns
+    -------
+    function
+        A function of no arguments that returns the first goal state found by
+        incremental_dfs(), or None if there is no goal state
+    """
+
+    return _build_solver(tuple(multipliers), cube_width)
+
+
+@lru_cache(maxsize=None)
+def _build_solver(multipliers, cube_width):
+    """Cached implementation of build_solver()."""
+
+    space = SnakePuzzleSearchSpace(multipliers, cube_width)
+    start = space.get_incremental_start_state()
+    steps = space._steps.values()
+    source = _SOLVER_TEMPLATE.format(
+        total=space._total_length, n_cells=cube_width ** 3, w=cube_width, w1=cube_width - 1,
+        r=space._radix, cube_mask=space._cube_mask, strides=repr(space._strides),
+        free_neighbors=" + ".join(f"(unvisited >> (new_index + ({step})) & 1)" for step in steps),
+        directions=repr(start.directions), visited=start.visited, head=repr(start.head),
+        head_index=start.head_index, bbox_min=repr(start.bbox_min), bbox_max=repr(start.bbox_max))
+    namespace = {"IS_PIVOT": tuple(space._is_pivot),
+                 "REVERSED_TURNS": {direction: turns[::-1] for direction, turns in TURNS.items()},
+                 "MOVES": space._moves,
+                 "degree_prune": _degree_prune,
+                 "is_connected_mask": _is_connected_mask,
+                 "canonical_key": space._canonical_key}
+    exec(compile(source, f"<snake solver {multipliers}, {cube_width}>", "exec"), namespace)
+    return namespace["solve"]
+
+
+def dfs_numba(multipliers, cube_width):
+    """Solves a snake puzzle with a Numba-compiled version of incremental_dfs().
+
+    This requires the optional numba package.
+
+    Parameters
+    ----------
+    multipliers : tuple[int]
+        The segment lengths of the snake
+    cube_width : int
+        The width of the cube to be formed
+
+    Returns
+    -------
+    tuple[str]
+        The first goal state found, or None if there is no goal state
+
+    Raises
+    ------
+    ImportError
+        If numba is not installed
+    """
+
+    try:
+        import numpy as np
+        from puzzle_numba import dfs_kernel
+    except ImportError:
+        raise ImportError("dfs_numba() requires numba") from None
+    total = sum(multipliers)
+    is_pivot = np.zeros(total + 1, np.bool_)
+    for i in range(len(multipliers)):
+        is_pivot[sum(multipliers[:i])] = True
+    solution = dfs_kernel(is_pivot, total, cube_width)
+    if len(solution) == 0:
+        return None
+    directions = tuple(DIRS)
+    return tuple(directions[d] for d in solution)
+
+
+SOLUTION_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "snake_puzzle")
+
+# bump this whenever the solver or the cache file format changes, to discard old files
+SOLUTION_CACHE_VERSION = 2
+
+
+def _is_solution(space, solution):
+    """Checks whether a sequence of directions (e.g. read from disk) solves a puzzle.
+
+    Parameters
+    ----------
+    space : SnakePuzzleSearchSpace
+        The puzzle
+    solution : list[str]
+        A sequence of directions
+
+    Returns
+    -------
+    bool
+        True iff the sequence extends the start state one legal move at a time
+        and is a goal state
+    """
+
+    start = space.get_start_state()
+    if (not isinstance(solution, list) or len(solution) != space._total_length
+            or tuple(solution[:len(start)]) != start):
+        return False
+    for length in range(len(start), len(solution)):
+        if solution[length] not in space.next_directions(solution[:length]):
+            return False
+    return space.is_goal_state(tuple(solution))
+
+
+def _load_or_compute(name, space):
+    """Solves a snake puzzle, reusing the solution saved by a previous run if there is one.
+
+    Solutions are saved as JSON files in SOLUTION_CACHE_DIR, along with the puzzle they
+    solve and SOLUTION_CACHE_VERSION. A saved solution is only used if both match and it
+    actually solves the puzzle; otherwise (including when the file cannot be read or
+    parsed) the puzzle is solved again and the file is replaced. Failing to write the
+    cache is not an error. Puzzles without a solution are not cached.
+
+    Parameters
+    ----------
+    name : str
+        The name of the cache file (without extension)
+    space : SnakePuzzleSearchSpace
+        The puzzle to solve
+
+    Returns
+    -------
+    tuple[str]
+        The first goal state found, or None if there is no goal state
+    """
+
+    path = os.path.join(SOLUTION_CACHE_DIR, f"{name}.json")
+    puzzle = [list(space.multipliers), space.cube_width]
+    try:
+        with open(path) as reader:
+            cached = json.load(reader)
+        if (cached["version"] == SOLUTION_CACHE_VERSION and cached["puzzle"] == puzzle
+                and _is_solution(space, cached["solution"])):
+            return tuple(cached["solution"])
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    solution = build_solver(space.multipliers, space.cube_width)()
+    if solution is None:
+        return None
+    temp_path = None
+    try:
+        os.makedirs(SOLUTION_CACHE_DIR, exist_ok=True)
+        # a unique temporary file, so that concurrent runs never write to the same file
+        with tempfile.NamedTemporaryFile("w", dir=SOLUTION_CACHE_DIR, suffix=".tmp",
+                                         delete=False) as writer:
+            temp_path = writer.name
+            json.dump({"version": SOLUTION_CACHE_VERSION, "puzzle": puzzle,
+                       "solution": solution}, writer)
+        os.replace(temp_path, path)
+    except OSError:
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+    return solution
+
+
+@lru_cache(maxsize=None)
 def puzzle_solution():
-    return dfs(StandardSnakePuzzle())
+    return _load_or_compute("standard", StandardSnakePuzzle())
 
+@lru_cache(maxsize=None)
 def solution_b():
-    return dfs(SnakePuzzleB())
+    return _load_or_compute("b", SnakePuzzleB())
 
+@lru_cache(maxsize=None)
 def solution_c():
-    return dfs(SnakePuzzleC())
+    return _load_or_compute("c", SnakePuzzleC())
+
+
+if __name__ == '__main__':
+    for solution in (puzzle_solution, solution_b, solution_c):
+        print(f"{solution.__name__}: {'-'.join(solution())}")
 
@@ -0,0 +1,199 @@
+"""Numba-compiled kernels behind puzzle.dfs_numba().
+
+These live in their own module so that importing puzzle does not pay for importing
+numba and compiling the kernels; puzzle.dfs_numba() imports this module on first use.
+"""
+
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def kernel_is_valid(grid, queue, deltas, w, x, y, z, bbox_min, bbox_max, n_unvisited):
+    """Compiled equivalent of puzzle.SnakePuzzleSearchSpace.is_valid_trajectory().
+
+    (x,y,z) is the new head, which should already be marked as visited in the grid.
+    """
+
+    r = 2 * w + 1
+    ax, ay, az = bbox_min[0], bbox_min[1], bbox_min[2]
+    placed = True
+    for axis in range(3):
+        if bbox_max[axis] - bbox_min[axis] < w - 1:
+            placed = False
+    if placed:
+        # see puzzle._degree_prune()
+        endpoints = 0
+        for i in range(w * w * w):
+            cx, cy, cz = ax + i // (w * w), ay + (i // w) % w, az + i % w
+            if grid[((cx + w) * r + (cy + w)) * r + (cz + w)] != 0:
+                continue
+            degree = 0
+            for d in range(6):
+                nx, ny, nz = cx + deltas[d, 0], cy + deltas[d, 1], cz + deltas[d, 2]
+                if nx == x and ny == y and nz == z:
+                    degree += 1
+                elif ax <= nx < ax + w and ay <= ny < ay + w and az <= nz < az + w:
+                    if grid[((nx + w) * r + (ny + w)) * r + (nz + w)] == 0:
+                        degree += 1
+            if degree == 0:
+                return False
+            if degree == 1:
+                endpoints += 1
+                if endpoints > 1:
+                    return False
+    # flood fill the unvisited cells of the cube, temporarily flagging them with 2
+    n_reached = 0
+    for i in range(w * w * w):
+        cx, cy, cz = ax + i // (w * w), ay + (i // w) % w, az + i % w
+        if grid[((cx + w) * r + (cy + w)) * r + (cz + w)] == 0:
+            grid[((cx + w) * r + (cy + w)) * r + (cz + w)] = 2
+            queue[0, 0], queue[0, 1], queue[0, 2] = cx, cy, cz
+            n_reached = 1
+            break
+    head = 0
+    while head < n_reached:
+        cx, cy, cz = queue[head, 0], queue[head, 1], queue[head, 2]
+        head += 1
+        for d in range(6):
+            nx, ny, nz = cx + deltas[d, 0], cy + deltas[d, 1], cz + deltas[d, 2]
+            if ax <= nx < ax + w and ay <= ny < ay + w and az <= nz < az + w:
+                neighbor = ((nx + w) * r + (ny + w)) * r + (nz + w)
+                if grid[neighbor] == 0:
+                    grid[neighbor] = 2
+                    queue[n_reached, 0] = nx
+                    queue[n_reached, 1] = ny
+                    queue[n_reached, 2] = nz
+                    n_reached += 1
+    for i in range(n_reached):
+        cx, cy, cz = queue[i, 0], queue[i, 1], queue[i, 2]
+        grid[((cx + w) * r + (cy + w)) * r + (cz + w)] = 0
+    return n_reached == n_unvisited
+
+
+@njit(cache=True)
+def kernel_free_neighbors(grid, deltas, w, x, y, z, bbox_min):
+    """Compiled equivalent of puzzle.SnakePuzzleSearchSpace.free_neighbors()."""
+
+    r = 2 * w + 1
+    count = 0
+    for d in range(6):
+        nx, ny, nz = x + deltas[d, 0], y + deltas[d, 1], z + deltas[d, 2]
+        if (bbox_min[0] <= nx < bbox_min[0] + w and bbox_min[1] <= ny < bbox_min[1] + w
+                and bbox_min[2] <= nz < bbox_min[2] + w):
+            if grid[((nx + w) * r + (ny + w)) * r + (nz + w)] == 0:
+                count += 1
+    return count
+
+
+@njit(cache=True)
+def dfs_kernel(is_pivot, total, cube_width):
+    """Compiled equivalent of puzzle.incremental_dfs(), without the symmetry pruning.
+
+    Directions are encoded as integers in the order of puzzle.DIRS (E, W, N, S, U, D), and
+    positions are packed into a (2 * cube_width + 1)-wide grid of visited flags.
+
+    Returns
+    -------
+    numpy.ndarray
+        The encoded directions of the first goal state found (empty if there is none)
+    """
+
+    deltas = np.array([[1, 0, 0], [-1, 0, 0], [0, 1, 0],
+                       [0, -1, 0], [0, 0, 1], [0, 0, -1]])
+    w = cube_width
+    r = 2 * w + 1
+    n_cells = w * w * w
+    grid = np.zeros(r * r * r, np.uint8)
+    queue = np.empty((n_cells, 3), np.int64)
+    traj = np.zeros(total, np.int8)
+    next_choice = np.zeros(total + 1, np.int64)
+    # the valid directions at each depth, in the order they should be tried
+    order = np.zeros((total + 1, 4), np.int64)
+    n_order = np.zeros(total + 1, np.int64)
+    scores = np.zeros(4, np.int64)
+    candidates = np.zeros(4, np.int64)
+    heads = np.zeros((total + 1, 3), np.int64)
+    bbox_min = np.zeros((total + 1, 3), np.int64)
+    bbox_max = np.zeros((total + 1, 3), np.int64)
+    grid[(w * r + w) * r + w] = 1
+    # the start state ('E',)
+    traj[0] = 0
+    heads[1, 0] = 1
+    bbox_max[1, 0] = 1
+    grid[((w + 1) * r + w) * r + w] = 1
+    depth = 1
+    while depth > 0:
+        if depth + 1 == n_cells:
+            return traj[:depth].copy()
+        if next_choice[depth] == 0:
+            # see puzzle.SnakePuzzleSearchSpace.next_directions() and .valid_directions()
+            last = traj[depth - 1]
+            n_candidates = 0
+            if depth >= total:
+                pass
+            elif not is_pivot[depth]:
+                candidates[0] = last
+                n_candidates = 1
+            else:
+                for d in range(5, -1, -1):
+                    if d // 2 != last // 2:
+                        candidates[n_candidates] = d
+                        n_candidates += 1
+            n = 0
+            for k in range(n_candidates):
+                direction = candidates[k]
+                x = heads[depth, 0] + deltas[direction, 0]
+                y = heads[depth, 1] + deltas[direction, 1]
+                z = heads[depth, 2] + deltas[direction, 2]
+                index = ((x + w) * r + (y + w)) * r + (z + w)
+                if grid[index]:
+                    continue
+                fits = True
+                for axis, c in enumerate((x, y, z)):
+                    lo = min(bbox_min[depth, axis], c)
+                    hi = max(bbox_max[depth, axis], c)
+                    bbox_min[depth + 1, axis] = lo
+                    bbox_max[depth + 1, axis] = hi
+                    if hi - lo >= w:
+                        fits = False
+                if not fits:
+                    continue
+                grid[index] = 1
+                if kernel_is_valid(grid, queue, deltas, w, x, y, z, bbox_min[depth + 1],
+                                    bbox_max[depth + 1], n_cells - (depth + 2)):
+                    score = 0
+                    if n_candidates > 1:
+                        score = kernel_free_neighbors(grid, deltas, w, x, y, z,
+                                                       bbox_min[depth + 1])
+                    # stable insertion by score
+                    j = n
+                    while j > 0 and scores[j - 1] > score:
+                        scores[j] = scores[j - 1]
+                        order[depth, j] = order[depth, j - 1]
+                        j -= 1
+                    scores[j] = score
+                    order[depth, j] = direction
+                    n += 1
+                grid[index] = 0
+            n_order[depth] = n
+        choice = next_choice[depth]
+        next_choice[depth] += 1
+        if choice >= n_order[depth]:
+            x, y, z = heads[depth, 0], heads[depth, 1], heads[depth, 2]
+            grid[((x + w) * r + (y + w)) * r + (z + w)] = 0
+            depth -= 1
+            continue
+        direction = order[depth, choice]
+        x = heads[depth, 0] + deltas[direction, 0]
+        y = heads[depth, 1] + deltas[direction, 1]
+        z = heads[depth, 2] + deltas[direction, 2]
+        for axis, c in enumerate((x, y, z)):
+            bbox_min[depth + 1, axis] = min(bbox_min[depth, axis], c)
+            bbox_max[depth + 1, axis] = max(bbox_max[depth, axis], c)
+        grid[((x + w) * r + (y + w)) * r + (z + w)] = 1
+        traj[depth] = direction
+        depth += 1
+        heads[depth, 0], heads[depth, 1], heads[depth, 2] = x, y, z
+        next_choice[depth] = 0
+    return traj[:0].copy()
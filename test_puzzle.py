@@ -0,0 +1,189 @@
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import puzzle
+import search
+from puzzle import (SnakePuzzleSearchSpace, StandardSnakePuzzle, SnakePuzzleB, SnakePuzzleC,
+                    build_solver, dfs_numba, incremental_dfs, is_connected, parallel_dfs,
+                    positions_visited, shift_into_positive_space)
+
+
+# (multipliers, cube_width) of some small puzzles, solvable or not
+PUZZLES = [
+    (StandardSnakePuzzle().multipliers, 3),
+    (SnakePuzzleB().multipliers, 3),
+    (SnakePuzzleC().multipliers, 3),
+    ((1, 1, 1, 1, 1, 1, 1), 2),
+    ((2, 1, 1, 1, 1, 1), 2),
+    ((1, 1, 2, 1, 1, 1, 1, 1, 1, 2, 1, 1, 1, 1, 1, 2, 1, 1, 2, 1, 2), 3),
+    ((2, 2, 2, 1, 2, 1, 1, 1, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2), 3),
+    ((1, 1, 1, 1, 1, 1, 1, 1, 2, 1, 1, 1, 1, 2, 2, 1, 1, 2, 1, 1, 1, 1), 3),
+    ((2, 2, 1, 1, 1, 2, 1, 2, 1, 2, 1, 1, 1, 2, 1, 1, 2, 1, 1), 3),
+    ((2, 1, 1, 2, 1, 1, 1, 2, 2, 1, 1, 2, 1, 2, 1, 1, 1, 2, 1), 3),
+    ((1, 2, 2, 1, 1, 2, 2, 1, 2, 2, 1, 1, 2, 1, 1, 1, 1, 1, 1), 3),
+    ((2, 2, 1, 1, 2, 2, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2, 1, 1), 3),
+]
+
+
+class UnprunedSnakePuzzle(SnakePuzzleSearchSpace):
+    """The snake puzzle with the original validity check, i.e. without dead-end pruning."""
+
+    def is_valid_state(self, state):
+        positions = shift_into_positive_space(positions_visited(state))
+        unvisited = list(self.goal_positions - set(positions))
+        return (max(max(position) for position in positions) < self.cube_width
+                and len(set(positions)) == len(positions) and is_connected(unvisited))
+
+    def get_successors(self, state):
+        return [state + (direction,) for direction in self.next_directions(state)
+                if self.is_valid_state(state + (direction,))]
+
+
+def quiet_dfs(space):
+    """Runs search.dfs without printing the number of search nodes visited."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return search.dfs(space)
+
+
+def baseline_dfs(multipliers, cube_width):
+    """Solves a puzzle with search.dfs, which explores the same tree as the other solvers."""
+    return quiet_dfs(SnakePuzzleSearchSpace(multipliers, cube_width))
+
+
+class TestPruning(unittest.TestCase):
+
+    def test_solvable_iff_unpruned_search_is(self):
+        for multipliers, cube_width in PUZZLES:
+            with self.subTest(multipliers=multipliers, cube_width=cube_width):
+                expected = quiet_dfs(UnprunedSnakePuzzle(multipliers, cube_width))
+                space = SnakePuzzleSearchSpace(multipliers, cube_width)
+                solution = incremental_dfs(space)
+                self.assertEqual(solution is None, expected is None)
+                if solution is not None:
+                    self.assertTrue(space.is_goal_state(solution))
+
+    def test_standard_puzzles_are_solved(self):
+        with tempfile.TemporaryDirectory() as cache_dir, \
+                mock.patch.object(puzzle, "SOLUTION_CACHE_DIR", cache_dir):
+            for solve, space in ((puzzle.puzzle_solution, StandardSnakePuzzle()),
+                                 (puzzle.solution_b, SnakePuzzleB()),
+                                 (puzzle.solution_c, SnakePuzzleC())):
+                with self.subTest(solve=solve.__name__):
+                    solve.cache_clear()
+                    solution = solve()
+                    solve.cache_clear()
+                    self.assertIsNotNone(solution)
+                    self.assertTrue(space.is_goal_state(solution))
+
+
+class TestSolverEquivalence(unittest.TestCase):
+
+    def test_solvers_agree_with_search_dfs(self):
+        # incremental_dfs and build_solver explore the tree in the same order as search.dfs
+        for multipliers, cube_width in PUZZLES:
+            with self.subTest(multipliers=multipliers, cube_width=cube_width):
+                expected = baseline_dfs(multipliers, cube_width)
+                space = SnakePuzzleSearchSpace(multipliers, cube_width)
+                self.assertEqual(incremental_dfs(space), expected)
+                self.assertEqual(build_solver(multipliers, cube_width)(), expected)
+
+    def test_parallel_dfs_agrees_with_incremental_dfs(self):
+        # PUZZLES includes a puzzle whose start state has no valid successors
+        for multipliers, cube_width in PUZZLES:
+            with self.subTest(multipliers=multipliers, cube_width=cube_width):
+                space = SnakePuzzleSearchSpace(multipliers, cube_width)
+                self.assertEqual(parallel_dfs(space, processes=2), incremental_dfs(space))
+
+    def test_parallel_dfs_follows_forced_moves_to_a_goal(self):
+        space = StandardSnakePuzzle()
+        solution = incremental_dfs(space)
+        space.start_state = solution[:-1]
+        self.assertEqual(parallel_dfs(space, processes=2), solution)
+
+    @unittest.skipUnless(importlib.util.find_spec("numba"), "numba is not installed")
+    def test_numba_kernel_agrees_with_search_dfs(self):
+        for multipliers, cube_width in PUZZLES:
+            with self.subTest(multipliers=multipliers, cube_width=cube_width):
+                self.assertEqual(dfs_numba(multipliers, cube_width),
+                                 baseline_dfs(multipliers, cube_width))
+
+    def test_build_solver_accepts_lists(self):
+        multipliers = list(StandardSnakePuzzle().multipliers)
+        self.assertEqual(build_solver(multipliers, 3)(), build_solver(tuple(multipliers), 3)())
+
+
+class TestSolutionCache(unittest.TestCase):
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = mock.patch.object(puzzle, "SOLUTION_CACHE_DIR", cache_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache_dir = cache_dir.name
+        self.path = os.path.join(cache_dir.name, "standard.json")
+        self.space = StandardSnakePuzzle()
+        self.solution = build_solver(self.space.multipliers, self.space.cube_width)()
+
+    def write_cache(self, contents):
+        with open(self.path, "w") as writer:
+            writer.write(contents if isinstance(contents, str) else json.dumps(contents))
+
+    def cache_entry(self, **changes):
+        entry = {"version": puzzle.SOLUTION_CACHE_VERSION,
+                 "puzzle": [list(self.space.multipliers), self.space.cube_width],
+                 "solution": list(self.solution)}
+        entry.update(changes)
+        return entry
+
+    def test_writes_solution(self):
+        self.assertEqual(puzzle._load_or_compute("standard", self.space), self.solution)
+        with open(self.path) as reader:
+            self.assertEqual(json.load(reader), self.cache_entry())
+        self.assertEqual(os.listdir(self.cache_dir), ["standard.json"])
+
+    def test_reuses_valid_solution(self):
+        self.write_cache(self.cache_entry())
+        with mock.patch.object(puzzle, "build_solver", side_effect=AssertionError("solved again")):
+            self.assertEqual(puzzle._load_or_compute("standard", self.space), self.solution)
+
+    def test_ignores_and_rewrites_invalid_files(self):
+        illegal_move = list(self.solution)
+        # reversing the snake's direction is never legal
+        reverse = tuple(-step for step in puzzle.DIRS[self.solution[-2]])
+        illegal_move[-1] = next(d for d, step in puzzle.DIRS.items() if step == reverse)
+        not_a_goal = list(self.space.get_start_state())
+        while len(not_a_goal) < len(self.solution):
+            not_a_goal.append(self.space.next_directions(not_a_goal)[0])
+        self.assertFalse(self.space.is_goal_state(tuple(not_a_goal)))
+        b = SnakePuzzleB()
+        invalid = {
+            "wrong version": self.cache_entry(version=puzzle.SOLUTION_CACHE_VERSION - 1),
+            "wrong puzzle": self.cache_entry(puzzle=[list(b.multipliers), b.cube_width]),
+            "malformed json": '{"version": ',
+            "truncated solution": self.cache_entry(solution=list(self.solution[:-1])),
+            "illegal move": self.cache_entry(solution=illegal_move),
+            "not a goal state": self.cache_entry(solution=not_a_goal),
+            "no solution": self.cache_entry(solution=None),
+        }
+        for description, contents in invalid.items():
+            with self.subTest(description):
+                self.write_cache(contents)
+                self.assertEqual(puzzle._load_or_compute("standard", self.space), self.solution)
+                with open(self.path) as reader:
+                    self.assertEqual(json.load(reader), self.cache_entry())
+
+    def test_unsolvable_puzzle_writes_no_file(self):
+        space = SnakePuzzleSearchSpace((2, 1, 1, 1, 1, 1), 2)
+        self.assertIsNone(puzzle._load_or_compute("unsolvable", space))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()